@@ -30,7 +30,7 @@ import sys
 import traceback
 
 # Cars-mesh imports
-from cars_mesh import __version__, reconstruct_pipeline, setup_logging
+from cars_mesh import __version__, setup_logging
 
 
 def get_parser() -> argparse.ArgumentParser:
@@ -85,6 +85,12 @@ def main() -> None:
     try:
         # use a global try/except to cath
         # run cars-mesh main reconstruct pipeline
+        # (imported here so that --help and --version do not load the
+        # processing libraries, open3d in particular)
+        from cars_mesh import (  # pylint: disable=import-outside-toplevel
+            reconstruct_pipeline,
+        )
+
         reconstruct_pipeline.main(args.config)
     except Exception:  # pylint: disable=broad-except
         logging.error(" Cars-mesh %s", traceback.format_exc())
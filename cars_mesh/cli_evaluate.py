@@ -29,7 +29,7 @@ import sys
 import traceback
 
 # Cars-mesh imports
-from cars_mesh import __version__, evaluate_pipeline, setup_logging
+from cars_mesh import __version__, setup_logging
 
 
 def get_parser() -> argparse.ArgumentParser:
@@ -82,6 +82,12 @@ def main() -> None:
     try:
         # use a global try/except to cath
         # run cars-mesh main evaluate pipeline
+        # (imported here so that --help and --version do not load the
+        # processing libraries, open3d in particular)
+        from cars_mesh import (  # pylint: disable=import-outside-toplevel
+            evaluate_pipeline,
+        )
+
         evaluate_pipeline.main(args.config)
     except Exception:  # pylint: disable=broad-except
         logging.error(" cars-mesh-evaluate %s", traceback.format_exc())
@@ -24,22 +24,25 @@ high-frequency information.
 """
 # pylint: disable=unsubscriptable-object
 
+# Standard imports
+from typing import Union
 
 # Third party imports
 import numpy as np
-import open3d as o3d
 from scipy.spatial import KDTree
 from tqdm import tqdm
 
 # Cars-mesh imports
 from ..tools.handlers import PointCloud
+from ..tools.neighbours import query_knn
+from ..tools.normals import compute_normals_from_indexes
 
 
 def compute_pcd_normals_o3d(
     pcd: PointCloud,
     neighbour_search_method: str = "knn",
-    knn: int = 100,
-    radius: float = 5.0,
+    knn: int = 30,
+    radius: Union[float, None] = 5.0,
 ) -> PointCloud:
     """
     Compute point cloud normals with open3d library
@@ -49,24 +52,35 @@ def compute_pcd_normals_o3d(
     pcd: PointCloud
         Point cloud instance
     neighbour_search_method: str (default="knn")
-        Neighbour search method
+        Neighbour search method: "knn", "ball" or "hybrid" (at most 'knn'
+        neighbours within the ball of radius 'radius', which bounds the
+        search of both methods)
     knn: int (default=30)
-        If "neighbour_search_method" is "knn", number of neighbours to consider
-    radius: float (default=5.)
-        If "neighbour_search_method" is "ball", ball radius in which to find
-        the neighbours
+        If "neighbour_search_method" is "knn" or "hybrid", (maximum) number
+        of neighbours to consider
+    radius: float or None (default=5.)
+        If "neighbour_search_method" is "ball" or "hybrid", ball radius in
+        which to find the neighbours. If None, it is set to 5 times the mean
+        distance of the points to their nearest neighbour.
     """
 
-    if neighbour_search_method not in ["knn", "ball"]:
+    if neighbour_search_method not in ["knn", "ball", "hybrid"]:
         raise ValueError(
-            f"Neighbour search method should either be 'knn' or 'ball'. "
-            f"Here found '{neighbour_search_method}'."
+            f"Neighbour search method should either be 'knn', 'ball' or "
+            f"'hybrid'. Here found '{neighbour_search_method}'."
         )
 
     # Init
+    import open3d as o3d  # pylint: disable=import-outside-toplevel
+
     if pcd.o3d_pcd is None:
         pcd.set_o3d_pcd_from_df()
 
+    if radius is None and neighbour_search_method != "knn":
+        radius = 5.0 * float(
+            np.mean(pcd.o3d_pcd.compute_nearest_neighbor_distance())
+        )
+
     # Compute normals
     if neighbour_search_method == "knn":
         # Nearest neighbour search
@@ -78,14 +92,16 @@ def compute_pcd_normals_o3d(
         pcd.o3d_pcd.estimate_normals(
             o3d.geometry.KDTreeSearchParamRadius(radius),
         )
+    elif neighbour_search_method == "hybrid":
+        # Nearest neighbour search bounded by a ball
+        pcd.o3d_pcd.estimate_normals(
+            o3d.geometry.KDTreeSearchParamHybrid(radius, knn),
+        )
     else:
         raise NotImplementedError
 
-    # Assign it to the df
-    normals = np.asarray(pcd.o3d_pcd.normals)
-    pcd.df = pcd.df.assign(
-        n_x=normals[:, 0], n_y=normals[:, 1], n_z=normals[:, 2]
-    )
+    # Assign it to the df (in a single block insertion)
+    pcd.set_df_normals(pcd.o3d_pcd.normals)
 
     return pcd
 
@@ -141,21 +157,104 @@ def compute_point_normal(
     return normal
 
 
-def weight_exp(distance: np.ndarray, mean_distance: np.ndarray) -> np.ndarray:
-    """Decreasing exponential function for weighting"""
+def weight_exp(
+    distance: np.ndarray, mean_distance: np.ndarray, squared: bool = False
+) -> np.ndarray:
+    """
+    Decreasing exponential function for weighting
+
+    If 'squared' is True, 'distance' is given as a squared distance (which
+    avoids computing a square root to square it again).
+    """
     if np.any(mean_distance == 0.0):
         raise ValueError("Mean distance should be > 0.")
-    return np.exp(-(distance**2) / mean_distance**2)
+    sq_distance = distance if squared else distance**2
+    return np.exp(-sq_distance / mean_distance**2)
+
 
+def weight_gaussian(
+    distance: np.ndarray, sigma: np.ndarray, squared: bool = False
+) -> np.ndarray:
+    """
+    Decreasing function inspired by the gaussian function for weighting
 
-def weight_gaussian(distance: np.ndarray, sigma: np.ndarray) -> np.ndarray:
-    """Decreasing function inspired by the gaussian function for weighting"""
+    If 'squared' is True, 'distance' is given as a squared distance (which
+    avoids computing a square root to square it again).
+    """
     if sigma == 0.0:
         raise ValueError("Sigma should be > 0.")
-    return np.exp(-(np.asarray(distance) ** 2) / (2 * (sigma**2)))
+    distance = np.asarray(distance)
+    sq_distance = distance if squared else distance**2
+    return np.exp(-sq_distance / (2 * (sigma**2)))
 
 
-def compute_pcd_normals(
+def _compute_batch_normals(
+    cloud_xyz: np.ndarray,
+    ind: np.ndarray,
+    idx_start: int,
+    sigma_d: Union[float, None] = None,
+    color_data: Union[np.ndarray, None] = None,
+    sigma_c: float = 125.0,
+) -> np.ndarray:
+    """
+    Compute the normals of a batch of consecutive points of the cloud, whose
+    neighbours can be weighted by their distance and their color
+
+    Parameters
+    ----------
+    cloud_xyz: (M, 3) np.ndarray
+        Coordinates of the points of the cloud
+    ind: (N, k) np.ndarray
+        Indexes of the neighbours of the points idx_start to idx_start + N - 1
+    idx_start: int
+        Index of the first point of the batch
+    sigma_d: float or None (default=None)
+        Standard deviation over the spatial distance to use in the
+        exponential weighting function. If None, the neighbours are not
+        weighted by their distance.
+    color_data: (M, c) np.ndarray or None (default=None)
+        Colors of the points of the cloud. If None, the neighbours are not
+        weighted by their color.
+    sigma_c: float (default=125.)
+        Standard deviation over the color distance to use in the exponential
+        weighting function
+
+    Returns
+    -------
+    normals: (N, 3) np.ndarray
+        Local normal vectors of the batch
+    """
+    idx_end = idx_start + ind.shape[0]
+    weights = None
+
+    if sigma_d is not None:
+        # Weighting of the variance according to the distance to the
+        # neighbours (the points' coordinates are broadcast). The weights are
+        # in float64 whatever the coordinates' dtype, so that the covariance
+        # matrices are too (float32 ones lose the small weights)
+        distance = cloud_xyz[ind] - cloud_xyz[idx_start:idx_end, None, :]
+        sq_distance = np.einsum(
+            "ijk,ijk->ij", distance, distance, dtype=np.float64
+        )
+        del distance
+        # Deduce the associated weights
+        weights = weight_exp(sq_distance, sigma_d, squared=True)
+
+    if color_data is not None:
+        # Weighting of the variance according to the radiometric difference
+        # with the neighbours (the points' colors are broadcast)
+        distance = color_data[ind] - color_data[idx_start:idx_end, None, :]
+        sq_distance = np.einsum("ijk,ijk->ij", distance, distance)
+        del distance
+        # Deduce the associated weights
+        color_weights = weight_exp(sq_distance, sigma_c, squared=True)
+        weights = color_weights if weights is None else weights * color_weights
+
+    # Compute the normals of the batch at once
+    return compute_normals_from_indexes(cloud_xyz, ind, weights)
+
+
+def compute_pcd_normals(  # pylint: disable=too-many-arguments
     pcd: PointCloud,
     neighbour_search_method: str = "knn",
     knn: int = 30,
@@ -164,8 +263,9 @@ def compute_pcd_normals(
     sigma_d: float = 0.5,
     weights_color: bool = False,
     sigma_c: float = 125.0,
-    workers: int = 1,
+    workers: int = -1,
     use_open3d: bool = True,
+    computation_dict: dict = None,
 ) -> PointCloud:
     """
     Compute the normal for each point of the cloud
@@ -175,7 +275,8 @@ def compute_pcd_normals(
     pcd: PointCloud
         Point cloud instance
     neighbour_search_method: str (default="knn")
-        Neighbour search method
+        Neighbour search method: "knn", "ball" or "hybrid" (the latter is
+        only available if 'use_open3d' is True, see compute_pcd_normals_o3d)
     knn: int (default=30)
         If "neighbour_search_method" is "knn", number of neighbours to consider
     radius: float (default=5.)
@@ -194,11 +295,27 @@ def compute_pcd_normals(
     sigma_c: float (default=125.)
         If 'weights_color' is True, it is the standard deviation over the
         color distance to use in the exponential weighting function
-    workers: int (default=1)
-        Number of workers to query the KDtree (neighbour search)
+    workers: int (default=-1)
+        Number of workers to query the KDtree (neighbour search). If -1, all
+        the CPUs are used.
     use_open3d: bool (default=False)
         Whether to use open3d normal computation instead. No weighting is
         applied to neighbours in that case.
+    computation_dict: dict (default=None)
+        Dictionary to tune the computation if 'use_open3d' is False:
+
+        * tree: KDTree (default=None).
+          KDTree already built on the point coordinates, to avoid building it
+          again. If None, the neighbours are queried with nanoflann if
+          pynanoflann is installed, with scipy otherwise.
+
+        * batch_size: int (default=200000).
+          Number of points whose weights and normals are computed at once,
+          to bound the memory of the (batch_size, knn, 3) temporary arrays.
+
+        * dtype: type (default=np.float32).
+          Floating point type of the (centred) coordinates used to compute
+          the weights and the covariance matrices.
 
     Returns
     -------
@@ -206,95 +323,92 @@ def compute_pcd_normals(
         Point cloud instance
     """
 
-    if neighbour_search_method not in ["knn", "ball"]:
+    if neighbour_search_method not in ["knn", "ball", "hybrid"]:
         raise ValueError(
-            f"Neighbour search method should either be 'knn' or 'ball'. "
-            f"Here found '{neighbour_search_method}'."
+            f"Neighbour search method should either be 'knn', 'ball' or "
+            f"'hybrid'. Here found '{neighbour_search_method}'."
+        )
+
+    if computation_dict is not None and not isinstance(computation_dict, dict):
+        raise TypeError(
+            f"'computation_dict' should be a dict or `None`, however found a "
+            f"{type(computation_dict)}."
+        )
+    computation_dict = {
+        "tree": None,
+        "batch_size": 200_000,
+        "dtype": np.float32,
+        **(computation_dict or {}),
+    }
+
+    if computation_dict["batch_size"] < 1:
+        raise ValueError(
+            f"'batch_size' should be a positive integer. Here found: "
+            f"{computation_dict['batch_size']}."
         )
 
     if use_open3d:
-        pcd = compute_pcd_normals_o3d(
+        return compute_pcd_normals_o3d(
             pcd, neighbour_search_method, knn=knn, radius=radius
         )
 
-    else:
-        # Init
-        tree = KDTree(pcd.df[["x", "y", "z"]].to_numpy())
-        results = np.zeros_like(pcd.df[["x", "y", "z"]].to_numpy())
+    if neighbour_search_method == "ball":
+        raise NotImplementedError(
+            "Due to memory consumption, scipy ball query is unusable: "
+            "https://github.com/scipy/scipy/issues/12956."
+        )
+    if neighbour_search_method == "hybrid":
+        raise NotImplementedError(
+            "Hybrid neighbour search is only available with open3d "
+            "('use_open3d' set to True)."
+        )
 
-        if neighbour_search_method == "knn":
-            # Query the tree by knn for each point cloud data
-            # ind is of shape (num_points, num_neighbours)
-            _, ind = tree.query(
-                pcd.df[["x", "y", "z"]].to_numpy(), k=knn, workers=workers
-            )
-        elif neighbour_search_method == "ball":
-            raise NotImplementedError(
-                "Due to memory consumption, scipy ball query is unusable: "
-                "https://github.com/scipy/scipy/issues/12956."
-            )
-            # # Query the tree by radius for each point cloud data
-            # ind = tree.query_ball_point(pcd.df[["x", "y", "z"]].to_numpy(),
-            # r=radius, workers=workers, return_sorted=False,
-            # return_length=False)
-        else:
-            raise NotImplementedError
+    # Init: convert the coordinates once
+    tree = computation_dict["tree"]
+    cloud_xyz = (
+        pcd.df[["x", "y", "z"]].to_numpy() if tree is None else tree.data
+    )
 
-        weights = None
-        if weights_distance:
-            # Weighting of the variance according to the distance to
-            # the neighbours
-            # Fetch points' nearest neighbours coordinates
-            data_tmp = tree.data[ind]
-            # Duplicate points' coordinates for vector operation
-            data_duplicated = np.reshape(
-                np.repeat(tree.data, data_tmp.shape[1], 0), data_tmp.shape
-            )
-            # Compute distance for each point of the cloud to each of its
-            # neighbours
-            distance = data_tmp - data_duplicated
-            del data_tmp
-            del data_duplicated
-            distance = np.linalg.norm(distance, axis=-1)
-            # Deduce the associated weights
-            weights = weight_exp(distance, sigma_d)
-
-        if weights_color:
-            # Weighting of the variance according to the radiometric
-            # difference with the neighbours
-            # Fetch the points' colors
-            color_data = pcd.get_colors().to_numpy()
-            # Fetch points' nearest neighbours colors
-            color_tmp = color_data[ind]
-            # Duplicate points' colors for vector operation
-            color_duplicated = np.reshape(
-                np.repeat(color_data, color_tmp.shape[1], 0), color_tmp.shape
-            )
-            # Compute distance for each point of the cloud to each of its
-            # neighbours' colors
-            distance = color_tmp - color_duplicated
-            del color_tmp
-            del color_duplicated
-            distance = np.linalg.norm(distance, axis=-1)
-            # Deduce the associated weights
-            weights = (
-                weight_exp(distance, sigma_c)
-                if weights is None
-                else weights * weight_exp(distance, sigma_c)
-            )
+    # Query the tree by knn for each point cloud data
+    # ind is of shape (num_points, num_neighbours)
+    if tree is None:
+        # With nanoflann if it is installed, scipy otherwise
+        _, ind = query_knn(cloud_xyz, knn, workers=workers)
+    else:
+        _, ind = tree.query(cloud_xyz, k=knn, workers=workers)
+        ind = np.reshape(ind, (ind.shape[0], -1))
+
+    # The neighbours are found with the original coordinates. The weights and
+    # covariance matrices are then computed on centred coordinates, which can
+    # be cast to float32 without losing the local precision (halves the
+    # memory traffic of the neighbours gather)
+    cloud_xyz = (cloud_xyz - np.mean(cloud_xyz, axis=0)).astype(
+        computation_dict["dtype"], order="C"
+    )
 
-        # Loop on each point of the data to compute its normal
-        for k, row in tqdm(
-            enumerate(ind), desc="Normal computation by PCA per point"
-        ):
-            weights_k = weights if weights is None else weights[k]
-            results[k, :] = compute_point_normal(tree.data[row, :], weights_k)
+    # Fetch the points' colors
+    color_data = (
+        pcd.get_colors().to_numpy(dtype=np.float64) if weights_color else None
+    )
 
-        # Add normals information to the dataframe
-        pcd.df = pcd.df.assign(
-            n_x=results[:, 0], n_y=results[:, 1], n_z=results[:, 2]
+    # Process the points by batches to bound the memory of the
+    # (batch_size, k, 3) temporary arrays
+    batch_size = computation_dict["batch_size"]
+    results = np.empty((cloud_xyz.shape[0], 3))
+    for idx_start in range(0, cloud_xyz.shape[0], batch_size):
+        results[idx_start : idx_start + batch_size] = _compute_batch_normals(
+            cloud_xyz,
+            ind[idx_start : idx_start + batch_size],
+            idx_start,
+            sigma_d=sigma_d if weights_distance else None,
+            color_data=color_data,
+            sigma_c=sigma_c,
         )
 
+    # Add normals information to the dataframe (in a single block
+    # insertion)
+    pcd.set_df_normals(results)
+
     return pcd
 
 
@@ -331,8 +445,9 @@ def bilateral_filtering(
           If "neighbour_search_method" is "ball", ball radius in which to
           find the neighbours
 
-        * num_workers_kdtree: int (default=1).
-          Number of workers to query the KDtree (neighbour search)
+        * num_workers_kdtree: int (default=-1).
+          Number of workers to query the KDtree (neighbour search). If -1,
+          all the CPUs are used.
 
     sigma_d: float (default=0.5)
         Variance on the distance between a point and its neighbours
@@ -432,6 +547,12 @@ def bilateral_filtering(
     # Compute normals
     #################
 
+    # The same KDTree is used for the normal computation and the first
+    # iteration of the filter (the point coordinates have not changed yet)
+    cloud_tree = KDTree(
+        pcd.df.loc[:, ["x", "y", "z"]].to_numpy(), copy_data=True
+    )
+
     pcd = compute_pcd_normals(
         pcd,
         neighbour_normals_dict["neighbour_search_method_normals"],
@@ -441,13 +562,14 @@ def bilateral_filtering(
         weights_color=neighbour_normals_dict["weights_color"],
         workers=neighbour_kdtree_dict["num_workers_kdtree"],
         use_open3d=neighbour_normals_dict["use_open3d"],
+        computation_dict={"tree": cloud_tree},
     )
 
     # Make sure normals are unitary, otherwise normalize them
     if not pcd.are_normals_unitary:
         pcd.set_unitary_normals()
 
-    normal_cloud = KDTree(pcd.df[["n_x", "n_y", "n_z"]].to_numpy())
+    normals = pcd.get_normals_array()
 
     ###########################
     # Apply bilateral filtering
@@ -495,7 +617,7 @@ def bilateral_filtering(
         if neighbour_kdtree_dict["neighbour_search_method"] == "knn":
             # Query the tree by knn for each point cloud data
             _, ind = cloud_tree.query(
-                pcd.df.loc[idx_start : idx_end - 1, "x":"z"].to_numpy(),
+                cloud_tree.data[idx_start:idx_end],
                 k=neighbour_kdtree_dict["knn"],
                 workers=neighbour_kdtree_dict["num_workers_kdtree"],
             )
@@ -516,33 +638,24 @@ def bilateral_filtering(
 
         # Euclidean distance from the point to its neighbors
         # The bigger it is, the lesser the weighting is
-        distances = cloud_tree.data[ind, :] - np.repeat(
-            cloud_tree.data[idx_start:idx_end, None, :],
-            repeats=neighbour_kdtree_dict["knn"],
-            axis=1,
+        distances = (
+            cloud_tree.data[ind, :]
+            - cloud_tree.data[idx_start:idx_end, None, :]
         )
-        d_d = np.linalg.norm(distances, axis=-1)
+        # (squared, since only its square is used by the gaussian weighting)
+        sq_d_d = np.einsum("ijk,ijk->ij", distances, distances)
 
         # Cosinus between the normal of the point and the ones of its neighbors
         # The bigger it is, the lesser the weighting is
-        d_n = np.sum(
-            np.multiply(
-                distances,
-                np.repeat(
-                    normal_cloud.data[idx_start:idx_end, None, :],
-                    neighbour_kdtree_dict["knn"],
-                    axis=1,
-                ),
-            ),
-            axis=-1,
-        )
+        d_n = np.einsum("ijk,ik->ij", distances, normals[idx_start:idx_end, :])
         del distances
 
         # Compute weighting of each neighbor according to
         # - its distance from the point
         # - its normal orientation
         weights = np.multiply(
-            weight_gaussian(d_d, sigma_d), weight_gaussian(d_n, sigma_n)
+            weight_gaussian(sq_d_d, sigma_d, squared=True),
+            weight_gaussian(d_n, sigma_n),
         )
         delta_p = np.sum(weights * d_n, axis=1)
         sum_w = np.sum(weights, axis=1)
@@ -551,9 +664,7 @@ def bilateral_filtering(
 
         # Compute weights and apply to normal vectors (w * n)
         coeff = np.where(sum_w == 0.0, 0.0, delta_p / sum_w)
-        w_n = (
-            np.reshape(coeff, (-1, 1)) * normal_cloud.data[idx_start:idx_end, :]
-        )
+        w_n = np.reshape(coeff, (-1, 1)) * normals[idx_start:idx_end, :]
 
         # Change points' position along its normal as: p_new = p + w * n
         pcd.df.loc[idx_start : idx_end - 1, "x":"z"] = (
@@ -561,15 +672,16 @@ def bilateral_filtering(
         )
 
     # Iterations
-    for _ in tqdm(
+    for iteration in tqdm(
         range(num_iterations), position=0, leave=False, desc="Iterations"
     ):
         # Compute the KDTree at each iteration
         # Because by changing the point coordinates, you can change the k
         # nearest neighbours
-        cloud_tree = KDTree(
-            pcd.df.loc[:, ["x", "y", "z"]].to_numpy(), copy_data=True
-        )
+        if iteration > 0:
+            cloud_tree = KDTree(
+                pcd.df.loc[:, ["x", "y", "z"]].to_numpy(), copy_data=True
+            )
 
         # Number of workers for iterations should be adapted according to the
         # point cloud size, the number of knn and
@@ -25,20 +25,57 @@ point cloud.
 
 # Standard imports
 import logging
+import math
 from typing import Union
 
 # Third party imports
 import numpy as np
-from scipy.spatial import KDTree
+import open3d as o3d
 
 # cars-mesh imports
 from ..tools.handlers import PointCloud
+from ..tools.jit import NUMBA_AVAILABLE, njit, prange
+from ..tools.neighbours import query_knn_distances
 
 # cars v3
 # from cars.steps.point_cloud import small_components_filtering, statistical_
 # outliers_filtering
 
 
+def points_to_o3d_tensor(
+    cloud_xyz: np.ndarray, device: o3d.core.Device
+) -> o3d.core.Tensor:
+    """
+    Convert point coordinates to a float32 open3d tensor on a given device.
+
+    Points are centred beforehand so that the cast to float32 does not
+    degrade the precision of large coordinates (UTM for instance). Distances
+    between points are unchanged.
+
+    Parameters
+    ----------
+    cloud_xyz: (N, 3) np.ndarray
+        Point coordinates
+    device: o3d.core.Device
+        Device on which to allocate the tensor
+
+    Returns
+    -------
+    points: (N, 3) o3d.core.Tensor
+        Centred point coordinates
+    """
+    # Centre (in float64) and cast into a C-contiguous float32 buffer
+    centred_xyz = (cloud_xyz - np.mean(cloud_xyz, axis=0)).astype(
+        np.float32, order="C"
+    )
+
+    if device.get_type() == o3d.core.Device.DeviceType.CPU:
+        # Share the numpy buffer without any copy
+        return o3d.core.Tensor.from_numpy(centred_xyz)
+
+    return o3d.core.Tensor(centred_xyz, device=device)
+
+
 def statistical_filtering_outliers_o3d(
     pcd: PointCloud, nb_neighbors: int, std_factor: float
 ) -> PointCloud:
@@ -67,25 +104,42 @@ def statistical_filtering_outliers_o3d(
         Filtered point cloud data
     """
 
-    # Check if open3d point cloud is initialized
-    if pcd.o3d_pcd is None:
-        pcd.set_o3d_pcd_from_df()
+    # Save the number of points before processing
+    num_points_before = pcd.df.shape[0]
 
-    pcd.o3d_pcd, ind_valid_pts = pcd.o3d_pcd.remove_statistical_outlier(
-        nb_neighbors, std_ratio=std_factor
+    # Query the nearest neighbours of all the points at once with the open3d
+    # tensor API (parallel search, on GPU if CUDA is available)
+    device = o3d.core.Device(
+        "CUDA:0" if o3d.core.cuda.is_available() else "CPU:0"
+    )
+    points = points_to_o3d_tensor(pcd.df[["x", "y", "z"]].to_numpy(), device)
+    nns = o3d.core.nns.NearestNeighborSearch(points)
+    nns.knn_index()
+    _, sq_distances = nns.knn_search(points, nb_neighbors)
+
+    # Mean distance of each point to its neighbours (the point itself is
+    # included in its neighbours, as in open3d legacy implementation)
+    mean_distances = np.mean(np.sqrt(sq_distances.cpu().numpy()), axis=1)
+    dist_thresh = np.mean(mean_distances) + std_factor * np.std(
+        mean_distances, ddof=1
+    )
+    ind_valid_pts = np.flatnonzero(
+        (mean_distances > 0.0) & (mean_distances < dist_thresh)
     )
 
-    # Save the number of points before processing
-    num_points_before = pcd.df.shape[0]
+    # The open3d point cloud is outdated: it will be set again from the
+    # filtered df when needed
+    pcd.o3d_pcd = None
 
-    # Get the point cloud filtered of the outlier points
-    pcd.df = pcd.df.loc[ind_valid_pts]
+    # Get the point cloud filtered of the outlier points (open3d returns
+    # positional indexes)
+    pcd.df = pcd.df.iloc[np.asarray(ind_valid_pts, dtype=np.intp)]
     # Reset indexes
     pcd.df.reset_index(drop=True, inplace=True)
 
     # Check if output point cloud is empty (and thus cannot suffer other
     # processing)
-    if pcd.df.empty:
+    if len(pcd.df.index) == 0:
         logging.error(
             "Point cloud output by the outlier filtering step is empty."
         )
@@ -124,26 +178,43 @@ def radius_filtering_outliers_o3(
         Filtered point cloud data
     """
 
-    # Check if open3d point cloud is initialized
-    if pcd.o3d_pcd is None:
-        pcd.set_o3d_pcd_from_df()
-
-    # Apply radius filtering
-    pcd.o3d_pcd, ind_valid_pts = pcd.o3d_pcd.remove_radius_outlier(
-        nb_points, radius
-    )
-
     # Save the number of points before processing
     num_points_before = pcd.df.shape[0]
 
-    # Get the point cloud filtered of the outlier points
-    pcd.df = pcd.df.loc[ind_valid_pts]
+    if o3d.core.cuda.is_available():
+        # Apply radius filtering on GPU with the open3d tensor API
+        t_pcd = o3d.t.geometry.PointCloud(
+            points_to_o3d_tensor(
+                pcd.df[["x", "y", "z"]].to_numpy(),
+                o3d.core.Device("CUDA:0"),
+            )
+        )
+        _, valid_mask = t_pcd.remove_radius_outliers(nb_points, radius)
+        ind_valid_pts = np.flatnonzero(valid_mask.cpu().numpy())
+
+        # The open3d point cloud is outdated: it will be set again from the
+        # filtered df when needed
+        pcd.o3d_pcd = None
+
+    else:
+        # Check if open3d point cloud is initialized
+        if pcd.o3d_pcd is None:
+            pcd.set_o3d_pcd_from_df()
+
+        # Apply radius filtering
+        pcd.o3d_pcd, ind_valid_pts = pcd.o3d_pcd.remove_radius_outlier(
+            nb_points, radius
+        )
+
+    # Get the point cloud filtered of the outlier points (open3d returns
+    # positional indexes)
+    pcd.df = pcd.df.iloc[np.asarray(ind_valid_pts, dtype=np.intp)]
     # Reset indexes
     pcd.df.reset_index(drop=True, inplace=True)
 
     # Check if output point cloud is empty (and thus cannot suffer
     # other processing)
-    if pcd.df.empty:
+    if len(pcd.df.index) == 0:
         logging.error(
             "Point cloud output by the outlier filtering step is empty."
         )
@@ -156,8 +227,72 @@ def radius_filtering_outliers_o3(
     return pcd
 
 
+# Fast math flags without the "no nan" and "no inf" assumptions, since
+# duplicated points lead to null mean distances
+@njit(
+    parallel=True,
+    fastmath={"nsz", "arcp", "contract", "afn", "reassoc"},
+    cache=True,
+)
+def _local_density_kernel(distances: np.ndarray) -> (np.ndarray, np.ndarray):
+    """Compiled per point computation of compute_local_density_outlier_proba"""
+    num_points, nb_neighbors = distances.shape
+    proba = np.empty(num_points)
+    mean_distances = np.empty(num_points)
+
+    for i in prange(num_points):  # pylint: disable=not-an-iterable
+        sum_distances = 0.0
+        for j in range(nb_neighbors):
+            sum_distances += distances[i, j]
+        mean_distances[i] = sum_distances / nb_neighbors
+
+        density = 0.0
+        for j in range(nb_neighbors):
+            density += math.exp(-distances[i, j] / mean_distances[i])
+        proba[i] = 1.0 - density / nb_neighbors
+
+    return proba, mean_distances
+
+
+def compute_local_density_outlier_proba(
+    distances: np.ndarray,
+) -> (np.ndarray, np.ndarray):
+    """
+    Compute the probability of each point to be an outlier from the
+    distances to its nearest neighbours:
+
+        proba_i = 1 - 1 / k * sum_j(exp(-d_ij / mean_j(d_ij)))
+
+    The computation is compiled with numba if it is installed.
+
+    Parameters
+    ----------
+    distances: (N, k) np.ndarray
+        Distances of each point to its k nearest neighbours
+
+    Returns
+    -------
+    proba: (N, ) np.ndarray
+        Probability of each point to be an outlier
+    mean_distances: (N, ) np.ndarray
+        Mean distance of each point to its neighbours
+    """
+    if NUMBA_AVAILABLE:
+        return _local_density_kernel(
+            np.ascontiguousarray(distances, dtype=np.float64)
+        )
+
+    mean_distances = np.mean(distances, axis=1)
+    density = np.mean(np.exp(-distances / mean_distances[:, None]), axis=1)
+
+    return 1 - density, mean_distances
+
+
 def local_density_analysis(
-    pcd: PointCloud, nb_neighbors: int, proba_thresh: Union[None, float] = None
+    pcd: PointCloud,
+    nb_neighbors: int,
+    proba_thresh: Union[None, float] = None,
+    workers: int = -1,
 ) -> PointCloud:
     """
     Compute the probability of a point to be an outlier based on the local
@@ -175,9 +310,12 @@ def local_density_analysis(
     proba_thresh: float (default = None)
         Probability threshold of a point to be an outlier. If 'None', then it
         is computed automatically per point as:
-        proba_thresh_i = 0.1 * dist_average_i
+        proba_thresh_i = 0.3 * dist_average_i
         with dist_average_i: Average distance of the point i to its
         neighbours
+    workers: int (default=-1)
+        Number of workers to query the KDtree (neighbour search). If -1, all
+        the CPUs are used.
 
     Returns
     -------
@@ -195,46 +333,28 @@ def local_density_analysis(
     # Get point positions
     cloud_xyz = pcd.df.loc[:, ["x", "y", "z"]].to_numpy()
 
-    # Build the neighbour tree
-    cloud_tree = KDTree(cloud_xyz)
+    # Get the nearest neighbours of all the points in a single query
+    # distances is of shape (num_points, nb_neighbors)
+    distances = query_knn_distances(cloud_xyz, nb_neighbors, workers=workers)
 
-    # Init variables
-    remove_pts_list = []
-    dist_average_list = []
-    proba_thresh_list = []
-
-    # Loop over the point cloud
-    for idx, _ in enumerate(cloud_xyz):
-        # get the point nearest neighbours
-        distances, _ = cloud_tree.query(cloud_xyz[idx], nb_neighbors)
-
-        # compute the local density
-        mean_neighbors_distances = np.sum(distances) / nb_neighbors
-        density = (1 / nb_neighbors) * np.sum(
-            np.exp(-distances / mean_neighbors_distances)
-        )
-
-        # define the probability of the point to be an outlier
-        proba = 1 - density
-
-        if proba_thresh is None:
-            dist_average_list.append(proba)
-            proba_thresh_i = 0.3 * mean_neighbors_distances
-            proba_thresh_list.append(proba_thresh_i)
+    # Compute the local density and deduce the probability of each point to
+    # be an outlier
+    proba, mean_neighbors_distances = compute_local_density_outlier_proba(
+        distances
+    )
 
-        else:
-            proba_thresh_i = proba_thresh
+    if proba_thresh is None:
+        proba_thresh = 0.3 * mean_neighbors_distances
 
-        if proba > proba_thresh_i:
-            remove_pts_list.append(idx)
+    remove_pts_mask = proba > proba_thresh
 
-    pcd.df = pcd.df.drop(index=pcd.df.index.values[remove_pts_list])
+    pcd.df = pcd.df.iloc[~remove_pts_mask]
     # Reset indexes
     pcd.df.reset_index(drop=True, inplace=True)
 
     # Check if output point cloud is empty (and thus cannot suffer other
     # processing)
-    if pcd.df.empty:
+    if len(pcd.df.index) == 0:
         logging.error(
             "Point cloud output by the outlier filtering step is empty."
         )
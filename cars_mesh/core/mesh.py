@@ -28,7 +28,6 @@ from typing import Union
 
 # Third party imports
 import matplotlib.tri as mtri
-import numpy as np
 import open3d as o3d
 from scipy.spatial import Delaunay
 
@@ -102,9 +101,7 @@ def ball_pivoting_reconstruction(
         pcd.set_o3d_normals()
 
     else:
-        pcd.o3d_pcd.normals = o3d.utility.Vector3dVector(
-            np.ascontiguousarray(pcd.df[["n_x", "n_y", "n_z"]].to_numpy())
-        )
+        pcd.set_o3d_normals()
 
     # Mesh point cloud
     if not isinstance(radii, list):
@@ -204,9 +201,7 @@ def poisson_reconstruction(
         pcd.set_o3d_normals()
 
     else:
-        pcd.o3d_pcd.normals = o3d.utility.Vector3dVector(
-            np.ascontiguousarray(pcd.df[["n_x", "n_y", "n_z"]].to_numpy())
-        )
+        pcd.set_o3d_normals()
 
     # Mesh point cloud
     o3d_mesh = o3d.geometry.TriangleMesh.create_from_point_cloud_poisson(
@@ -351,7 +351,7 @@ def texturing(mesh: Mesh, cfg: dict) -> Mesh:
         rpc.out_offset -= np.asarray(image_offset) - np.ones(2)
 
     # Convert vertices from UTM to geo (lon lat)
-    vertices = mesh.pcd.df[["x", "y", "z"]].to_numpy()
+    vertices = mesh.pcd.get_vertices_array()
     vertices_lon_lat = change_frame(
         pd.DataFrame(vertices, columns=["x", "y", "z"]), utm_code, 4326
     ).to_numpy()
@@ -382,7 +382,7 @@ def texturing(mesh: Mesh, cfg: dict) -> Mesh:
     )
 
     # Compute UVs
-    triangles = mesh.df[["p1", "p2", "p3"]].to_numpy()
+    triangles = mesh.get_triangles_array()
     triangles_uvs = generate_uvs(img_pts, triangles, bbox, img_texture_size)
     del triangles
 
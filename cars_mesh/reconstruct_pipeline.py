@@ -58,6 +58,19 @@ def run(cars_mesh_machine: CarsMeshMachine, cfg: dict) -> Mesh:
         # Check transitions' validity
         cars_mesh_machine.check_transitions(cfg)
 
+        # Create the directory to save intermediate results once, if any
+        # step asks for it
+        intermediate_folder = os.path.join(
+            cfg["output_dir"], "intermediate_results"
+        )
+        if any(step.get("save_output", False) for step in cfg["state_machine"]):
+            os.makedirs(intermediate_folder, exist_ok=True)
+            if os.listdir(intermediate_folder):
+                logging.warning(
+                    f"Directory '{intermediate_folder}' is not empty. "
+                    f"Some files might be overwritten."
+                )
+
         # Browse user defined steps and execute them
         for k, step in enumerate(cfg["state_machine"]):
             # Logger
@@ -71,17 +84,6 @@ def run(cars_mesh_machine: CarsMeshMachine, cfg: dict) -> Mesh:
             # (Optional) Save intermediate results to disk if asked
             if "save_output" in step:
                 if step["save_output"]:
-                    # Create directory to save intermediate results
-                    intermediate_folder = os.path.join(
-                        cfg["output_dir"], "intermediate_results"
-                    )
-                    os.makedirs(intermediate_folder, exist_ok=True)
-                    if k == 0 and os.listdir(intermediate_folder):
-                        logging.warning(
-                            f"Directory '{intermediate_folder}' is not empty. "
-                            f"Some files might be overwritten."
-                        )
-
                     # Save intermediates results
                     intermediate_filepath = os.path.join(
                         intermediate_folder,
@@ -24,42 +24,74 @@ Define classes for handling common objects
 
 # Standard imports
 import logging
-import os
-from typing import Union
+from typing import TYPE_CHECKING, Union
 
 # Third party imports
 import numpy as np
-import open3d as o3d
 import pandas as pd
 
+if TYPE_CHECKING:
+    # open3d is long to import: it is only imported when it is used
+    import open3d as o3d
+
 COLORS = ["red", "green", "blue", "nir"]
 NORMALS = ["n_x", "n_y", "n_z"]
 UVS = ["uv1_row", "uv1_col", "uv2_row", "uv2_col", "uv3_row", "uv3_col"]
 
 
+def df_columns_to_array(
+    df: pd.DataFrame, columns: list, dtype: np.dtype = np.float64
+) -> np.ndarray:
+    """
+    Gather some columns of a pandas DataFrame in a C-contiguous array with a
+    single copy (selecting the columns first would allocate an intermediate
+    DataFrame, and it would need another copy to be C-contiguous).
+
+    Parameters
+    ----------
+    df: pd.DataFrame
+        Data
+    columns: list
+        Names of the columns to gather
+    dtype: np.dtype (default=np.float64)
+        Data type of the output array
+
+    Returns
+    -------
+    arr: (N, len(columns)) np.ndarray
+        C-contiguous array
+    """
+    arr = np.empty((df.shape[0], len(columns)), dtype=dtype)
+    for k, c in enumerate(columns):
+        arr[:, k] = df[c].to_numpy()
+
+    return arr
+
+
 class PointCloud:
     """Point cloud data"""
 
     def __init__(
         self,
         df: Union[None, pd.DataFrame] = None,
-        o3d_pcd: Union[None, o3d.geometry.PointCloud] = None,
+        o3d_pcd: Union[None, "o3d.geometry.PointCloud"] = None,
     ) -> None:
-        if (not isinstance(df, pd.DataFrame)) and (df is not None):
+        if df is not None and not isinstance(df, pd.DataFrame):
             raise TypeError(
                 f"Input point cloud data 'df' should either be None or a "
                 f"pd.DataFrame. Here found "
                 f"'{type(df)}'."
             )
 
-        if (not isinstance(o3d_pcd, o3d.geometry.PointCloud)) and (
-            o3d_pcd is not None
-        ):
-            raise TypeError(
-                f"Input open3d point cloud data 'o3d_pcd' should either be "
-                f"None or a o3d.geometry.PointCloud. Here found "
-                f"'{type(o3d_pcd)}'."
-            )
+        if o3d_pcd is not None:
+            import open3d as o3d  # pylint: disable=import-outside-toplevel
+
+            if not isinstance(o3d_pcd, o3d.geometry.PointCloud):
+                raise TypeError(
+                    f"Input open3d point cloud data 'o3d_pcd' should either "
+                    f"be None or a o3d.geometry.PointCloud. Here found "
+                    f"'{type(o3d_pcd)}'."
+                )
 
         self.df = df
         self.o3d_pcd = o3d_pcd
@@ -85,15 +117,28 @@ class PointCloud:
         #  in the df pcd to bring them back? the
         #  point order might be different
 
-    def set_df_from_vertices(self, vertices: np.ndarray) -> None:
-        """Set point coordinates in the pandas DataFrame"""
+    def set_df_from_vertices(
+        self, vertices: np.ndarray, dtype: type = np.float64
+    ) -> None:
+        """
+        Set point coordinates in the pandas DataFrame
+
+        float32 halves the memory of the coordinates but cannot represent
+        large ones (UTM for instance) with a centimetre precision.
+        """
         self.df = pd.DataFrame(
-            data=np.asarray(vertices, dtype=np.float64), columns=["x", "y", "z"]
+            data=np.asarray(vertices, dtype=dtype), columns=["x", "y", "z"]
         )
 
     def set_df_colors(self, colors: np.ndarray, color_names: list) -> None:
         """Set color attributes per point in the pandas DataFrame"""
+        # no copy for numpy arrays (open3d vectors are also viewed in place)
         colors = np.asarray(colors)
+        if colors.ndim != 2:
+            raise ValueError(
+                f"Colors should be a 2D array (one row per point). "
+                f"Found {colors.ndim} dimension(s)."
+            )
 
         for c in color_names:
             if c not in COLORS:
@@ -111,7 +156,13 @@ class PointCloud:
 
     def set_df_normals(self, normals: np.ndarray) -> None:
         """Set normal attributes per point in the pandas DataFrame"""
+        # no copy for numpy arrays (open3d vectors are also viewed in place)
         normals = np.asarray(normals)
+        if normals.ndim != 2:
+            raise ValueError(
+                f"Normals should be a 2D array (one row per point). "
+                f"Found {normals.ndim} dimension(s)."
+            )
 
         if normals.shape[1] != 3:
             raise ValueError(
@@ -123,11 +174,11 @@ class PointCloud:
 
     def set_o3d_pcd_from_df(self):
         """Set open3d PointCloud from pandas.DataFrame"""
-        # add np.ascontiguousarray to avoid seg fault in c parts of open3d
+        import open3d as o3d  # pylint: disable=import-outside-toplevel
+
+        # use C-contiguous arrays to avoid seg fault in c parts of open3d
         self.o3d_pcd = o3d.geometry.PointCloud(
-            points=o3d.utility.Vector3dVector(
-                np.ascontiguousarray(self.df[["x", "y", "z"]].to_numpy())
-            )
+            points=o3d.utility.Vector3dVector(self.get_vertices_array())
         )
 
         if self.has_colors:
@@ -137,57 +188,70 @@ class PointCloud:
 
     def set_o3d_colors(self) -> None:
         """Set color attribute of open3D PointCloud"""
+        import open3d as o3d  # pylint: disable=import-outside-toplevel
+
         # Check o3d point cloud is initialized
         if self.o3d_pcd is None:
             raise ValueError("Open3D Point Cloud is empty.")
 
         # add colors if applicable (only RGB)
-        # init to zero
-        colors_arr = np.zeros_like(
-            self.df[["x", "y", "z"]].to_numpy(), dtype=np.float64
-        )
-        # retrieve information from the dataframe
-        for k, c in enumerate(["red", "green", "blue"]):
-            if c in self.df:
-                colors_arr[:, k] = self.df[c].to_numpy()
-            else:
-                raise ValueError(
-                    f"Open3D only deals with RGB colors. Here '{c}' is "
-                    f"missing."
-                )
-        # normalize colours in [0, 1]
-        colors_arr = np.divide(
-            colors_arr - colors_arr.min(),
-            colors_arr.max() - colors_arr.min(),
-            out=np.zeros_like(colors_arr),
-            where=(colors_arr.max() - colors_arr.min()) != 0.0,
-        )
         # add to opend3d point cloud
         self.o3d_pcd.colors = o3d.utility.Vector3dVector(
-            np.ascontiguousarray(colors_arr)
+            self.get_normalized_rgb_array()
         )
 
     def set_o3d_normals(self) -> None:
         """Set normal attribute of open3D PointCloud"""
+        import open3d as o3d  # pylint: disable=import-outside-toplevel
 
         # Check o3d point cloud is initialized
         if self.o3d_pcd is None:
             raise ValueError("Open3D Point Cloud is empty.")
 
         self.o3d_pcd.normals = o3d.utility.Vector3dVector(
-            np.ascontiguousarray(self.df[NORMALS].to_numpy())
+            self.get_normals_array()
         )
 
     def get_vertices(self) -> pd.DataFrame:
         """Get vertex data"""
         return self.df[["x", "y", "z"]]
 
+    def get_vertices_array(self) -> np.ndarray:
+        """Get vertex coordinates as a C-contiguous (N, 3) float64 array"""
+        return df_columns_to_array(self.df, ["x", "y", "z"])
+
+    def get_normalized_rgb_array(self) -> np.ndarray:
+        """
+        Get RGB colors normalized in [0, 1] (as expected by open3d) as a
+        C-contiguous (N, 3) float64 array
+        """
+        for c in ["red", "green", "blue"]:
+            if c not in self.df.columns:
+                raise ValueError(
+                    f"Open3D only deals with RGB colors. Here '{c}' is "
+                    f"missing."
+                )
+        # retrieve information from the dataframe in a single copy
+        colors_arr = df_columns_to_array(self.df, ["red", "green", "blue"])
+
+        # normalize colours in [0, 1]
+        # (the same scale is used for the three bands to keep their balance)
+        # in place: if all the values are equal, they are already null once
+        # the minimum is subtracted
+        colors_min = colors_arr.min()
+        colors_range = colors_arr.max() - colors_min
+        colors_arr -= colors_min
+        if colors_range != 0.0:
+            colors_arr /= colors_range
+
+        return colors_arr
+
     def get_colors(self) -> pd.DataFrame:
         """Get color data"""
         if not self.has_colors:
             raise ValueError("Point cloud has no color.")
 
-        return self.df[[c for c in COLORS if c in self.df.head()]]
+        return self.df[[c for c in COLORS if c in self.df.columns]]
 
     def get_normals(self) -> pd.DataFrame:
         """Get normals"""
@@ -196,6 +260,13 @@ class PointCloud:
 
         return self.df[NORMALS]
 
+    def get_normals_array(self) -> np.ndarray:
+        """Get normals as a C-contiguous (N, 3) float64 array"""
+        if not self.has_normals:
+            raise ValueError("Point cloud has no normals.")
+
+        return df_columns_to_array(self.df, NORMALS)
+
     def set_unitary_normals(self):
         """Make normals unitary (i.e. with a norm equal to 1.)"""
         if not self.has_normals:
@@ -211,7 +282,7 @@ class PointCloud:
         if self.df is None:
             raise ValueError("Point cloud (pandas DataFrame) is not assigned.")
 
-        return any(c in self.df.head() for c in COLORS)
+        return any(c in self.df.columns for c in COLORS)
 
     @property
     def has_normals(self) -> bool:
@@ -219,7 +290,7 @@ class PointCloud:
         if self.df is None:
             raise ValueError("Point cloud (pandas DataFrame) is not assigned.")
 
-        return all(n in self.df.head() for n in NORMALS)
+        return all(n in self.df.columns for n in NORMALS)
 
     @property
     def are_normals_unitary(self) -> bool:
@@ -245,7 +316,7 @@ class PointCloud:
         if self.df is None:
             raise ValueError("Point cloud (pandas DataFrame) is not assigned.")
 
-        return "classification" in self.df.head()
+        return "classification" in self.df.columns
 
     def serialize(self, filepath: str, **kwargs) -> None:
         """Serialize point cloud"""
@@ -267,8 +338,8 @@ class Mesh:
         self,
         pcd: Union[None, pd.DataFrame] = None,
         mesh: Union[None, pd.DataFrame] = None,
-        o3d_pcd: Union[None, o3d.geometry.PointCloud] = None,
-        o3d_mesh: Union[None, o3d.geometry.TriangleMesh] = None,
+        o3d_pcd: Union[None, "o3d.geometry.PointCloud"] = None,
+        o3d_mesh: Union[None, "o3d.geometry.TriangleMesh"] = None,
     ):
         self.pcd = PointCloud(df=pcd, o3d_pcd=o3d_pcd)
         self.df = mesh
@@ -319,7 +390,11 @@ class Mesh:
 
     def set_df_from_vertices(self, vertices) -> None:
         """Set pd.DataFrame from an array of vertices"""
-        self.df = pd.DataFrame(data=vertices, columns=["p1", "p2", "p3"])
+        # Triangle indexes are stored on 32 bits like in open3d
+        self.df = pd.DataFrame(
+            data=np.asarray(vertices, dtype=np.int32),
+            columns=["p1", "p2", "p3"],
+        )
 
     def set_image_texture_path(self, image_texture_path) -> None:
         """Set image texture path"""
@@ -355,6 +430,8 @@ class Mesh:
 
     def set_o3d_mesh_from_df(self) -> None:
         """Set open3d TriangleMesh from a pd.DataFrame"""
+        import open3d as o3d  # pylint: disable=import-outside-toplevel
+
         if self.df is None:
             raise ValueError(
                 "Could not set open3d mesh from df mesh because it is empty."
@@ -365,12 +442,8 @@ class Mesh:
             )
 
         self.o3d_mesh = o3d.geometry.TriangleMesh(
-            vertices=o3d.utility.Vector3dVector(
-                np.ascontiguousarray(self.pcd.df[["x", "y", "z"]].to_numpy())
-            ),
-            triangles=o3d.utility.Vector3iVector(
-                np.ascontiguousarray(self.df[["p1", "p2", "p3"]].to_numpy())
-            ),
+            vertices=o3d.utility.Vector3dVector(self.pcd.get_vertices_array()),
+            triangles=o3d.utility.Vector3iVector(self.get_triangles_array()),
         )
         # Add attributes if available
         # Mesh
@@ -387,6 +460,7 @@ class Mesh:
 
     def set_o3d_vertex_colors(self) -> None:
         """Set color attribute of open3D TriangleMesh"""
+        import open3d as o3d  # pylint: disable=import-outside-toplevel
 
         # Check o3d mesh is initialized
         if self.o3d_mesh is None:
@@ -395,33 +469,14 @@ class Mesh:
             )
 
         # add colors if applicable (only RGB)
-        # init to zero
-        colors_arr = np.zeros_like(
-            self.pcd.df[["x", "y", "z"]].to_numpy(), dtype=np.float64
-        )
-        # retrieve information from the dataframe
-        for k, c in enumerate(["red", "green", "blue"]):
-            if c in self.pcd.df:
-                colors_arr[:, k] = self.pcd.df[c].to_numpy()
-            else:
-                raise ValueError(
-                    f"Open3D only deals with RGB colors. Here '{c}' is "
-                    f"missing."
-                )
-        # normalize colours in [0, 1]
-        colors_arr = np.divide(
-            colors_arr - colors_arr.min(),
-            colors_arr.max() - colors_arr.min(),
-            out=np.zeros_like(colors_arr),
-            where=(colors_arr.max() - colors_arr.min()) != 0.0,
-        )
         # add to opend3d mesh
         self.o3d_mesh.vertex_colors = o3d.utility.Vector3dVector(
-            np.ascontiguousarray(colors_arr)
+            self.pcd.get_normalized_rgb_array()
         )
 
     def set_o3d_vertex_normals(self) -> None:
         """Set normal attribute of open3D TriangleMesh"""
+        import open3d as o3d  # pylint: disable=import-outside-toplevel
 
         # Check o3d mesh is initialized
         if self.o3d_mesh is None:
@@ -430,11 +485,12 @@ class Mesh:
             )
 
         self.o3d_mesh.vertex_normals = o3d.utility.Vector3dVector(
-            np.ascontiguousarray(self.pcd.df[NORMALS].to_numpy())
+            self.pcd.get_normals_array()
         )
 
     def set_o3d_image_texture_and_uvs(self) -> None:
         """Set image texture path and uvs of open3D TriangleMesh"""
+        import open3d as o3d  # pylint: disable=import-outside-toplevel
 
         # Check o3d mesh is initialized
         if self.o3d_mesh is None:
@@ -449,9 +505,9 @@ class Mesh:
             )
 
         # UVs in open3d are expressed as a (3 * num_triangles, 2)
-        # Reshape data before feeding open3d TriangleMesh
-        uvs = self.df[UVS].to_numpy()
-        uvs = uvs.reshape((-1, 2))
+        # Reshape data before feeding open3d TriangleMesh (the reshape of
+        # the C-contiguous array is a view, without any copy)
+        uvs = self.get_triangle_uvs_array().reshape((-1, 2))
         self.o3d_mesh.triangle_uvs = o3d.utility.Vector2dVector(uvs)
 
         # Add image texture path
@@ -461,6 +517,10 @@ class Mesh:
         """Get point triangle indexes"""
         return self.df[["p1", "p2", "p3"]]
 
+    def get_triangles_array(self) -> np.ndarray:
+        """Get point triangle indexes as a C-contiguous (M, 3) int32 array"""
+        return df_columns_to_array(self.df, ["p1", "p2", "p3"], dtype=np.int32)
+
     def get_triangle_uvs(self) -> pd.DataFrame:
         """Get triangle uvs"""
         if not self.has_triangle_uvs:
@@ -468,6 +528,13 @@ class Mesh:
 
         return self.df[UVS]
 
+    def get_triangle_uvs_array(self) -> np.ndarray:
+        """Get triangle uvs as a C-contiguous (M, 6) float64 array"""
+        if not self.has_triangle_uvs:
+            raise ValueError("Mesh has no triangle uvs.")
+
+        return df_columns_to_array(self.df, UVS)
+
     def get_image_texture_path(self) -> str:
         """Get image texture path"""
         if self.image_texture_path is None:
@@ -482,7 +549,7 @@ class Mesh:
             raise ValueError("Mesh (pandas DataFrame) is not assigned.")
 
         return (
-            all(n in self.df.head() for n in ["p1", "p2", "p3"])
+            all(n in self.df.columns for n in ["p1", "p2", "p3"])
             and not self.df.empty
         )
 
@@ -494,17 +561,7 @@ class Mesh:
 
         return (
             (self.image_texture_path is not None)
-            and all(
-                el in self.df.head()
-                for el in [
-                    "uv1_row",
-                    "uv1_col",
-                    "uv2_row",
-                    "uv2_col",
-                    "uv3_row",
-                    "uv3_col",
-                ]
-            )
+            and all(el in self.df.columns for el in UVS)
             and not self.df.empty
         )
 
@@ -514,20 +571,7 @@ class Mesh:
         if self.df is None:
             raise ValueError("Mesh (pandas DataFrame) is not assigned.")
 
-        return (
-            all(
-                el in self.df.head()
-                for el in [
-                    "uv1_row",
-                    "uv1_col",
-                    "uv2_row",
-                    "uv2_col",
-                    "uv3_row",
-                    "uv3_col",
-                ]
-            )
-            and not self.df.empty
-        )
+        return all(el in self.df.columns for el in UVS) and not self.df.empty
 
     @property
     def has_normals(self) -> bool:
@@ -535,7 +579,7 @@ class Mesh:
         if self.df is None:
             raise ValueError("Mesh (pandas DataFrame) is not assigned.")
 
-        return all(n in self.df.head() for n in NORMALS) and not self.df.empty
+        return all(n in self.df.columns for n in NORMALS) and not self.df.empty
 
     @property
     def has_classes(self) -> bool:
@@ -543,7 +587,7 @@ class Mesh:
         if self.df is None:
             raise ValueError("Mesh (pandas DataFrame) is not assigned.")
 
-        return "classification" in self.df.head() and not self.df.empty
+        return "classification" in self.df.columns and not self.df.empty
 
     def serialize(self, filepath: str, **kwargs) -> None:
         """Serialize mesh"""
@@ -575,7 +619,10 @@ def read_input_path(input_path: str) -> Mesh:
     """
     from ..param import MESH_FILE_EXTENSIONS
 
-    if os.path.basename(input_path).split(".")[-1] in MESH_FILE_EXTENSIONS:
+    # pylint: disable-next=import-outside-toplevel
+    from .point_cloud_io import get_file_extension
+
+    if get_file_extension(input_path) in MESH_FILE_EXTENSIONS:
         # Try reading input data as a mesh if the extension is valid
         mesh = Mesh()
         mesh.deserialize(input_path)
@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (C) 2023 CNES.
+#
+# This file is part of cars-mesh
+
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Optional just-in-time compilation of numerical kernels with numba.
+
+If numba is not installed, 'njit' leaves the decorated functions as pure
+python ones and 'prange' falls back on 'range'. Callers should check
+NUMBA_AVAILABLE to choose between a compiled kernel and a vectorized numpy
+implementation.
+"""
+
+__all__ = ["NUMBA_AVAILABLE", "njit", "prange"]
+
+try:
+    from numba import njit, prange
+
+    NUMBA_AVAILABLE = True
+
+except ImportError:
+    NUMBA_AVAILABLE = False
+    prange = range  # pylint: disable=invalid-name
+
+    def njit(*args, **kwargs):
+        """Replacement of numba.njit returning the function unchanged"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+
+        def decorator(func):
+            return func
+
+        return decorator
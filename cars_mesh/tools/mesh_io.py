@@ -27,7 +27,6 @@ from typing import Union
 
 # Third party imports
 import numpy as np
-import open3d as o3d
 import pandas as pd
 import plyfile
 
@@ -39,8 +38,11 @@ def write_triangle_mesh_o3d(
     filepath: str, mesh: Union[dict, Mesh], compressed: bool = True
 ):
     """Write triangle mesh to disk with open3d"""
+    import open3d as o3d  # pylint: disable=import-outside-toplevel
 
     if isinstance(mesh, Mesh):
+        # The legacy writer is kept on purpose: the tensor API falls back on
+        # it for PLY files, and would save 8-bit colors as 255
         mesh.set_o3d_mesh_from_df()
         o3d.io.write_triangle_mesh(
             filepath, mesh.o3d_mesh, compressed=compressed
@@ -61,21 +63,22 @@ def serialize_ply_texture(filepath: str, mesh: Mesh) -> None:
         Mesh object
     """
     # Vertices
-    vertices = mesh.pcd.get_vertices().to_numpy()
-    vertex = np.array(
-        list(zip(*vertices.T)), dtype=[("x", "f8"), ("y", "f8"), ("z", "f8")]
+    vertices = mesh.pcd.get_vertices_array()
+    vertex = np.empty(
+        len(vertices), dtype=[("x", "f8"), ("y", "f8"), ("z", "f8")]
     )
+    for k, c in enumerate(["x", "y", "z"]):
+        vertex[c] = vertices[:, k]
 
     # Faces + Texture
-    triangles = mesh.get_triangles().to_numpy()
+    triangles = mesh.get_triangles_array()
     ply_faces = np.empty(
         len(triangles),
         dtype=[("vertex_indices", "i4", (3,)), ("texcoord", "f8", (6,))],
     )  # 3 pairs of image coordinates
-    ply_faces["vertex_indices"] = triangles.astype("i4")
+    ply_faces["vertex_indices"] = triangles
 
-    triangles_uvs = mesh.get_triangle_uvs().to_numpy()
-    ply_faces["texcoord"] = triangles_uvs.astype("f8")
+    ply_faces["texcoord"] = mesh.get_triangle_uvs_array()
 
     # Define elements
     el_vertex = plyfile.PlyElement.describe(
@@ -103,10 +106,11 @@ def mesh2ply(filepath: str, mesh: Mesh, compressed: bool = True):
     """Mesh object to PLY mesh"""
 
     # Check consistency
-    if filepath.split(".")[-1] != "ply":
+    extension = pcd_io.get_file_extension(filepath)
+    if extension != "ply":
         raise ValueError(
             f"Filepath extension should be '.ply', but found: "
-            f"'{filepath.split('.')[-1]}'."
+            f"'{extension}'."
         )
 
     # # Write point cloud apart in a LAS file
@@ -130,13 +134,16 @@ def ply2mesh(filepath: str) -> (pd.DataFrame, pd.DataFrame):
     """PLY mesh to Mesh object"""
 
     # Check consistency
-    if filepath.split(".")[-1] != "ply":
+    extension = pcd_io.get_file_extension(filepath)
+    if extension != "ply":
         raise ValueError(
             f"Filepath extension should be '.ply', but found: "
-            f"'{filepath.split('.')[-1]}'."
+            f"'{extension}'."
         )
 
     # Read point cloud and faces
+    import open3d as o3d  # pylint: disable=import-outside-toplevel
+
     mesh = Mesh(o3d_mesh=o3d.io.read_triangle_mesh(filepath))
     mesh.set_df_from_o3d_mesh()
 
@@ -150,7 +157,7 @@ def ply2mesh(filepath: str) -> (pd.DataFrame, pd.DataFrame):
 
 def deserialize_mesh(filepath: str) -> (pd.DataFrame, pd.DataFrame):
     """Deserialize a mesh"""
-    extension = filepath.split(".")[-1]
+    extension = pcd_io.get_file_extension(filepath)
 
     if extension == "ply":
         mesh = ply2mesh(filepath)
@@ -164,9 +171,10 @@ def deserialize_mesh(filepath: str) -> (pd.DataFrame, pd.DataFrame):
 def serialize_mesh(filepath: str, mesh: Mesh, extension: str = "ply") -> None:
     """Serialize a mesh to disk in the format asked by the user"""
 
-    if filepath.split(".")[-1] != extension:
+    filepath_extension = pcd_io.get_file_extension(filepath)
+    if filepath_extension != extension:
         raise ValueError(
-            f"Filepath extension ('{filepath.split('.')[-1]}') is "
+            f"Filepath extension ('{filepath_extension}') is "
             f"inconsistent with the extension "
             f"asked ('{extension}')."
         )
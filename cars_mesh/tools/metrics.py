@@ -68,7 +68,7 @@ def chamfer_distance(dist_1: np.array, dist_2: np.array) -> float:
 
 
 def point_to_plane_distance(
-    pcd_in, pcd_ref, knn=30, workers=1, use_open3d=True, **kwargs
+    pcd_in, pcd_ref, knn=30, workers=-1, use_open3d=True, **kwargs
 ) -> np.ndarray:
     """
     The point-to-plane distance first computes the normal of the surface at
@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (C) 2023 CNES.
+#
+# This file is part of cars-mesh
+
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Neighbour search tools shared by the point cloud processing methods.
+"""
+
+# Standard imports
+import os
+
+# Third party imports
+import numpy as np
+from scipy.spatial import KDTree
+
+# Optional nanoflann binding for the neighbour search
+try:
+    import pynanoflann
+except ImportError:
+    pynanoflann = None
+
+# Whether to query the neighbours with nanoflann instead of scipy (only
+# effective if pynanoflann is installed)
+USE_NANOFLANN = pynanoflann is not None
+
+
+def _spread_bits_3d(values: np.ndarray) -> np.ndarray:
+    """
+    Insert two zero bits between each of the 21 lowest bits of the values,
+    so that three of them can be interleaved in a 63 bits Morton code
+    """
+    values = values.astype(np.uint64)
+    for shift, mask in (
+        (32, 0x1F00000000FFFF),
+        (16, 0x1F0000FF0000FF),
+        (8, 0x100F00F00F00F00F),
+        (4, 0x10C30C30C30C30C3),
+        (2, 0x1249249249249249),
+    ):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+
+    return values
+
+
+def morton_order(cloud_xyz: np.ndarray, nb_bits: int = 21) -> np.ndarray:
+    """
+    Compute the permutation that sorts the points along a Morton (Z-order)
+    curve, so that points close in space are also close in memory.
+
+    Parameters
+    ----------
+    cloud_xyz: (N, 3) np.ndarray
+        Point positions
+    nb_bits: int (default=21)
+        Number of bits used to quantize each coordinate (at most 21 so that
+        the interleaved code fits in 64 bits)
+
+    Returns
+    -------
+    order: (N, ) np.ndarray
+        Indices sorting the points along the Morton curve
+    """
+    if not 0 < nb_bits <= 21:
+        raise ValueError(
+            f"'nb_bits' should be contained in [1, 21]. Here found: {nb_bits}."
+        )
+
+    # Quantize the coordinates on a regular grid of the bounding box
+    min_xyz = np.min(cloud_xyz, axis=0)
+    extent = np.max(cloud_xyz, axis=0) - min_xyz
+    extent[extent == 0] = 1.0
+    quantized = ((cloud_xyz - min_xyz) * ((2**nb_bits - 1) / extent)).astype(
+        np.uint64
+    )
+
+    codes = (
+        _spread_bits_3d(quantized[:, 0])
+        | (_spread_bits_3d(quantized[:, 1]) << np.uint64(1))
+        | (_spread_bits_3d(quantized[:, 2]) << np.uint64(2))
+    )
+
+    return np.argsort(codes, kind="stable")
+
+
+def query_knn(
+    cloud_xyz: np.ndarray,
+    nb_neighbors: int,
+    workers: int = -1,
+    spatial_sort: bool = True,
+) -> (np.ndarray, np.ndarray):
+    """
+    Query the k nearest neighbours of each point of the cloud (the point
+    itself included).
+
+    The neighbour search is done with nanoflann if pynanoflann is installed
+    and 'USE_NANOFLANN' is True, with scipy otherwise.
+
+    Parameters
+    ----------
+    cloud_xyz: (N, 3) np.ndarray
+        Point coordinates
+    nb_neighbors: int
+        Number of neighbors to consider
+    workers: int (default=-1)
+        Number of workers to query the tree. If -1, all the CPUs are used.
+    spatial_sort: bool (default=True)
+        If True, the points are sorted along a Morton curve before building
+        and querying the tree, so that the tree leaves and the successive
+        queries are spatially coherent in memory (fewer cache misses).
+
+    Returns
+    -------
+    distances: (N, nb_neighbors) np.ndarray
+        Euclidean distances to the nearest neighbours sorted by increasing
+        order
+    indexes: (N, nb_neighbors) np.ndarray
+        Indexes of the nearest neighbours in 'cloud_xyz'
+    """
+    order = None
+    if spatial_sort and cloud_xyz.shape[0] > 1:
+        order = morton_order(cloud_xyz)
+        cloud_xyz = cloud_xyz[order]
+
+    if USE_NANOFLANN and pynanoflann is not None:
+        cloud_tree = pynanoflann.KDTree(
+            n_neighbors=nb_neighbors, metric="L2", leaf_size=32
+        )
+        cloud_tree.fit(cloud_xyz)
+        distances, indexes = cloud_tree.kneighbors(
+            cloud_xyz, n_jobs=os.cpu_count() if workers == -1 else workers
+        )
+
+    else:
+        # The tree is only used once, so favour a fast build (sliding
+        # midpoint rule without bounding box shrinking) over the query
+        # speed. Bigger leaves are scanned linearly, which is cache-friendly.
+        cloud_tree = KDTree(
+            cloud_xyz, leafsize=32, balanced_tree=False, compact_nodes=False
+        )
+        distances, indexes = cloud_tree.query(
+            cloud_xyz, k=nb_neighbors, workers=workers
+        )
+
+    distances = np.reshape(distances, (cloud_xyz.shape[0], -1))
+    indexes = np.reshape(indexes, (cloud_xyz.shape[0], -1))
+
+    # Map the results back to the input point order
+    if order is not None:
+        sorted_distances, sorted_indexes = distances, indexes
+        distances = np.empty_like(sorted_distances)
+        distances[order] = sorted_distances
+        indexes = np.empty_like(sorted_indexes)
+        indexes[order] = order[sorted_indexes]
+
+    return distances, indexes
+
+
+def query_knn_distances(
+    cloud_xyz: np.ndarray,
+    nb_neighbors: int,
+    workers: int = -1,
+    spatial_sort: bool = True,
+) -> np.ndarray:
+    """
+    Compute the distances of each point to its k nearest neighbours (the
+    point itself included). See query_knn.
+
+    Returns
+    -------
+    distances: (N, nb_neighbors) np.ndarray
+        Euclidean distances to the nearest neighbours sorted by increasing
+        order
+    """
+    distances, _ = query_knn(
+        cloud_xyz, nb_neighbors, workers=workers, spatial_sort=spatial_sort
+    )
+
+    return distances
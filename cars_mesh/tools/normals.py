@@ -0,0 +1,314 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (C) 2023 CNES.
+#
+# This file is part of cars-mesh
+
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+Tools to compute the normals of a batch of points with the PCA approach
+(eigen vector of the smallest eigen value of the neighbourhood covariance
+matrix).
+"""
+
+# Standard imports
+import math
+
+# Third party imports
+import numpy as np
+
+# Cars-mesh imports
+from .jit import NUMBA_AVAILABLE, njit, prange
+
+
+def symmetric_3x3_smallest_eigenvector(cov_mat: np.ndarray) -> np.ndarray:
+    """
+    Compute the unitary eigen vector associated with the smallest eigen value
+    of a batch of 3x3 symmetric positive semi-definite matrices.
+
+    The eigen values are computed in closed form from the characteristic
+    polynomial (trigonometric solution of the cubic equation), and the eigen
+    vector is the cross product of two rows of (A - lambda_min * I). The
+    matrices for which it is ill-conditioned (smallest eigen value of
+    multiplicity > 1) are handed to the Singular Value Decomposition.
+
+    Parameters
+    ----------
+    cov_mat: (N, 3, 3) np.ndarray
+        Symmetric positive semi-definite matrices
+
+    Returns
+    -------
+    eigen_vectors: (N, 3) np.ndarray
+        Unitary eigen vectors of the smallest eigen values
+    """
+    # Normalize by the trace to work on values close to 1
+    trace = np.trace(cov_mat, axis1=1, axis2=2)
+    scale = np.where(trace > 0.0, trace, 1.0)
+    mat = cov_mat / scale[:, None, None]
+
+    # Eigen values of A = q * I + p * B with det(B - 2 * cos(phi) * I) = 0
+    diag = np.diagonal(mat, axis1=1, axis2=2)
+    off_diag = mat[:, 0, 1] ** 2 + mat[:, 0, 2] ** 2 + mat[:, 1, 2] ** 2
+    q = np.sum(diag, axis=1) / 3.0
+    p = np.sqrt((np.sum((diag - q[:, None]) ** 2, axis=1) + 2 * off_diag) / 6)
+    b_mat = (mat - q[:, None, None] * np.eye(3)) / np.where(p > 0.0, p, 1.0)[
+        :, None, None
+    ]
+    r = np.clip(np.linalg.det(b_mat) / 2.0, -1.0, 1.0)
+    phi = np.arccos(r) / 3.0
+    lambda_min = q + 2.0 * p * np.cos(phi + 2.0 * np.pi / 3.0)
+
+    # The eigen vector is orthogonal to the rows of (A - lambda_min * I):
+    # take the most reliable (longest) cross product of two of its rows
+    rows = mat - lambda_min[:, None, None] * np.eye(3)
+    cross_products = np.stack(
+        [
+            np.cross(rows[:, 0], rows[:, 1]),
+            np.cross(rows[:, 0], rows[:, 2]),
+            np.cross(rows[:, 1], rows[:, 2]),
+        ],
+        axis=1,
+    )
+    sq_norms = np.einsum("nij,nij->ni", cross_products, cross_products)
+    best = np.argmax(sq_norms, axis=1)
+    best_sq_norms = np.take_along_axis(sq_norms, best[:, None], axis=1)[:, 0]
+    eigen_vectors = cross_products[np.arange(len(best)), best]
+
+    # Fall back on the SVD when the smallest eigen value is not simple
+    ill_conditioned = best_sq_norms <= 1e-16
+    eigen_vectors[~ill_conditioned] /= np.sqrt(best_sq_norms[~ill_conditioned])[
+        :, None
+    ]
+    if np.any(ill_conditioned):
+        u_arr, _, _ = np.linalg.svd(cov_mat[ill_conditioned])
+        eigen_vectors[ill_conditioned] = u_arr[:, :, -1]
+
+    return eigen_vectors
+
+
+def compute_neighbourhood_normals(
+    neighbours_coordinates: np.ndarray, weights: np.ndarray = None
+) -> np.ndarray:
+    """
+    Vectorized version of denoise_pcd.compute_point_normal: compute the
+    unitary normals of a batch of points with the PCA approach, from the
+    coordinates of their neighbours.
+
+    Parameters
+    ----------
+    neighbours_coordinates: (N, k, 3) np.ndarray
+        Coordinates of the k neighbours of each of the N points
+    weights: (N, k) np.ndarray (default=None)
+        Absolute weights of each neighbour in the covariance matrix of its
+        point (see numpy.cov documentation)
+
+    Returns
+    -------
+    normals: (N, 3) np.ndarray
+        Local normal vectors
+    """
+
+    if neighbours_coordinates.shape[1] <= 1:
+        raise ValueError(
+            "The cluster of points from which to compute the local normal "
+            "is empty or with just one point. Increase the ball radius."
+        )
+
+    # Weighted covariance matrices (biased estimator, as in
+    # compute_point_normal), computed for all the points at once
+    if weights is None:
+        weights = np.ones(neighbours_coordinates.shape[:2])
+    weights = weights / np.sum(weights, axis=1, keepdims=True)
+
+    centroids = np.einsum("nk,nki->ni", weights, neighbours_coordinates)
+    centered = neighbours_coordinates - centroids[:, None, :]
+    cov_mat = np.einsum("nk,nki,nkj->nij", weights, centered, centered)
+
+    # Extract local normals (eigen vectors of the smallest eigen values)
+    return symmetric_3x3_smallest_eigenvector(cov_mat)
+
+
+def compute_normals_from_indexes(
+    points: np.ndarray, ind: np.ndarray, weights: np.ndarray = None
+) -> np.ndarray:
+    """
+    Compute the unitary normals of a batch of points from the indexes of
+    their neighbours in the cloud (see compute_neighbourhood_normals).
+
+    The computation is compiled with numba if it is installed, which avoids
+    gathering the (N, k, 3) coordinates of the neighbours.
+
+    Parameters
+    ----------
+    points: (M, 3) np.ndarray
+        Coordinates of the points of the cloud
+    ind: (N, k) np.ndarray
+        Indexes in 'points' of the k neighbours of each of the N points
+    weights: (N, k) np.ndarray (default=None)
+        Absolute weights of each neighbour in the covariance matrix of its
+        point
+
+    Returns
+    -------
+    normals: (N, 3) np.ndarray
+        Local normal vectors
+    """
+    if NUMBA_AVAILABLE and ind.shape[1] > 1:
+        return _normals_kernel(
+            points, ind, np.empty((0, 0)) if weights is None else weights
+        )
+
+    return compute_neighbourhood_normals(points[ind], weights)
+
+
+@njit(cache=True)
+def _smallest_eigenvalue_3x3(
+    a00: float, a01: float, a02: float, a11: float, a12: float, a22: float
+) -> float:
+    """
+    Compiled scalar computation of the smallest eigen value of a 3x3
+    symmetric matrix (see symmetric_3x3_smallest_eigenvector)
+    """
+    # Eigen values of A = q * I + p * B with det(B - 2 * cos(phi) * I) = 0
+    q = (a00 + a11 + a22) / 3.0
+    p = math.sqrt(
+        (
+            (a00 - q) ** 2
+            + (a11 - q) ** 2
+            + (a22 - q) ** 2
+            + 2.0 * (a01**2 + a02**2 + a12**2)
+        )
+        / 6.0
+    )
+    inv_p = 1.0 / p if p > 0.0 else 1.0
+    b00, b11, b22 = (a00 - q) * inv_p, (a11 - q) * inv_p, (a22 - q) * inv_p
+    b01, b02, b12 = a01 * inv_p, a02 * inv_p, a12 * inv_p
+    r = (
+        b00 * (b11 * b22 - b12 * b12)
+        - b01 * (b01 * b22 - b12 * b02)
+        + b02 * (b01 * b12 - b11 * b02)
+    ) / 2.0
+    r = min(max(r, -1.0), 1.0)
+
+    return q + 2.0 * p * math.cos(math.acos(r) / 3.0 + 2.0 * math.pi / 3.0)
+
+
+@njit(cache=True)
+def _smallest_eigenvector_3x3(
+    c00: float, c01: float, c02: float, c11: float, c12: float, c22: float
+) -> (float, float, float):
+    """Compiled scalar version of symmetric_3x3_smallest_eigenvector"""
+    # Normalize by the trace to work on values close to 1
+    scale = c00 + c11 + c22
+    if scale <= 0.0:
+        scale = 1.0
+    a00, a01, a02 = c00 / scale, c01 / scale, c02 / scale
+    a11, a12, a22 = c11 / scale, c12 / scale, c22 / scale
+
+    lambda_min = _smallest_eigenvalue_3x3(a00, a01, a02, a11, a12, a22)
+
+    # Longest cross product of two rows of (A - lambda_min * I)
+    d00, d11, d22 = a00 - lambda_min, a11 - lambda_min, a22 - lambda_min
+    best_x = a01 * a12 - a02 * d11
+    best_y = a02 * a01 - d00 * a12
+    best_z = d00 * d11 - a01 * a01
+    best_sq_norm = best_x**2 + best_y**2 + best_z**2
+
+    v_x = a01 * d22 - a02 * a12
+    v_y = a02 * a02 - d00 * d22
+    v_z = d00 * a12 - a01 * a02
+    sq_norm = v_x**2 + v_y**2 + v_z**2
+    if sq_norm > best_sq_norm:
+        best_x, best_y, best_z, best_sq_norm = v_x, v_y, v_z, sq_norm
+
+    v_x = d11 * d22 - a12 * a12
+    v_y = a12 * a02 - a01 * d22
+    v_z = a01 * a12 - d11 * a02
+    sq_norm = v_x**2 + v_y**2 + v_z**2
+    if sq_norm > best_sq_norm:
+        best_x, best_y, best_z, best_sq_norm = v_x, v_y, v_z, sq_norm
+
+    # Fall back on the SVD when the smallest eigen value is not simple
+    if best_sq_norm <= 1e-16:
+        u_arr, _, _ = np.linalg.svd(
+            np.array(
+                [[c00, c01, c02], [c01, c11, c12], [c02, c12, c22]],
+                dtype=np.float64,
+            )
+        )
+        return u_arr[0, 2], u_arr[1, 2], u_arr[2, 2]
+
+    norm = math.sqrt(best_sq_norm)
+    return best_x / norm, best_y / norm, best_z / norm
+
+
+# No fast math flags: they are propagated to the eigen solver, whose
+# closed form is not stable under reassociation and approximate functions
+# for the nearly degenerate neighbourhoods
+@njit(parallel=True, cache=True)
+def _normals_kernel(
+    points: np.ndarray, ind: np.ndarray, weights: np.ndarray
+) -> np.ndarray:
+    """
+    Compiled per point computation of compute_neighbourhood_normals, which
+    reads the neighbours from their indexes instead of a (N, k, 3) gather.
+    'weights' is an empty array if the neighbours are not weighted.
+    """
+    num_points, knn = ind.shape
+    use_weights = weights.shape[0] > 0
+    normals = np.empty((num_points, 3))
+
+    for i in prange(num_points):  # pylint: disable=not-an-iterable
+        # Weighted centroid
+        sum_w = 0.0
+        m_x = 0.0
+        m_y = 0.0
+        m_z = 0.0
+        for j in range(knn):
+            w = weights[i, j] if use_weights else 1.0
+            sum_w += w
+            m_x += w * points[ind[i, j], 0]
+            m_y += w * points[ind[i, j], 1]
+            m_z += w * points[ind[i, j], 2]
+        m_x /= sum_w
+        m_y /= sum_w
+        m_z /= sum_w
+
+        # Weighted covariance matrix (biased estimator)
+        c00 = 0.0
+        c01 = 0.0
+        c02 = 0.0
+        c11 = 0.0
+        c12 = 0.0
+        c22 = 0.0
+        for j in range(knn):
+            w = (weights[i, j] if use_weights else 1.0) / sum_w
+            d_x = points[ind[i, j], 0] - m_x
+            d_y = points[ind[i, j], 1] - m_y
+            d_z = points[ind[i, j], 2] - m_z
+            c00 += w * d_x * d_x
+            c01 += w * d_x * d_y
+            c02 += w * d_x * d_z
+            c11 += w * d_y * d_y
+            c12 += w * d_y * d_z
+            c22 += w * d_z * d_z
+
+        normals[i, 0], normals[i, 1], normals[i, 2] = _smallest_eigenvector_3x3(
+            c00, c01, c02, c11, c12, c22
+        )
+
+    return normals
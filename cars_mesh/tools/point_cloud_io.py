@@ -24,16 +24,26 @@ Tools to manipulate point clouds
 
 # Standard imports
 import logging
-from typing import Union
+import os
+from typing import TYPE_CHECKING, Union
 
 # Third party imports
 import laspy
 import numpy as np
-import open3d as o3d
 import pandas as pd
 import plyfile
 import pyproj
 
+if TYPE_CHECKING:
+    # open3d is long to import: it is only imported when it is used
+    import open3d as o3d
+
+
+def get_file_extension(filepath: str) -> str:
+    """Get the extension of a file path in lower case and without the dot"""
+    return os.path.splitext(filepath)[1].lower().lstrip(".")
+
+
 # LAS tools
 
 
@@ -87,7 +97,7 @@ def apply_scale_offset(
 # -------------------------------------------------------------------------- #
 
 
-def o3d2df(o3d_pcd: o3d.geometry.PointCloud) -> pd.DataFrame:
+def o3d2df(o3d_pcd: "o3d.geometry.PointCloud") -> pd.DataFrame:
     """Open3D Point Cloud to pandas DataFrame"""
     from ..tools.handlers import PointCloud
 
@@ -102,19 +112,42 @@ def o3d2df(o3d_pcd: o3d.geometry.PointCloud) -> pd.DataFrame:
     return pcd.df
 
 
-def las2df(filepath: str) -> pd.DataFrame:
-    """LAS or LAZ point cloud to pandas DataFrame"""
-
-    las = laspy.read(filepath)
-    dimensions = las.points.array.dtype.names
-
-    df_pcd = pd.DataFrame(data=las.xyz, columns=["x", "y", "z"])
+def las2df(filepath: str, chunk_size: int = 1_000_000) -> pd.DataFrame:
+    """
+    LAS or LAZ point cloud to pandas DataFrame
 
-    for c in ["red", "green", "blue", "nir", "classification"]:
-        if c in dimensions:
-            df_pcd[c] = las.points.array[c]
+    The file is read by chunks of 'chunk_size' points and only the kept
+    dimensions are copied in preallocated arrays, so that the whole raw point
+    records are never loaded in memory at once.
+    """
 
-    return df_pcd
+    with laspy.open(filepath) as las_reader:
+        num_points = las_reader.header.point_count
+        dimensions = list(las_reader.header.point_format.dimension_names)
+        attributes = [
+            c
+            for c in ["red", "green", "blue", "nir", "classification"]
+            if c in dimensions
+        ]
+
+        # Build the DataFrame at once so that the columns sharing a dtype are
+        # stored in a single block (no fragmentation by successive insertions)
+        data = {c: np.empty(num_points, dtype=np.float64) for c in "xyz"}
+        for c in attributes:
+            # Bit fields (such as the classification of the point formats 0
+            # to 5) have no dtype of their own and fit in 8 bits
+            dtype = las_reader.header.point_format.dimension_by_name(c).dtype
+            data[c] = np.empty(num_points, dtype=dtype or np.uint8)
+
+        start = 0
+        for chunk in las_reader.chunk_iterator(chunk_size):
+            end = start + len(chunk)
+            # x, y and z are scaled and offset by laspy
+            for c in list("xyz") + attributes:
+                data[c][start:end] = chunk[c]
+            start = end
+
+    return pd.DataFrame(data)
 
 
 def pkl2df(filepath: str) -> pd.DataFrame:
@@ -125,14 +158,16 @@ def pkl2df(filepath: str) -> pd.DataFrame:
 def ply2df(filepath: str) -> pd.DataFrame:
     """PLY point cloud to pandas DataFrame"""
     plydata = plyfile.PlyData.read(filepath)
-
-    df_pcd = pd.DataFrame()
-
-    for propty in plydata.elements[0].properties:
-        name = propty.name
-        df_pcd[name] = np.array(plydata.elements[0].data[name])
-
-    return df_pcd
+    vertices = plydata.elements[0].data
+
+    # Build the DataFrame at once so that the columns sharing a dtype are
+    # stored in a single block (no fragmentation by successive insertions)
+    return pd.DataFrame(
+        {
+            propty.name: np.asarray(vertices[propty.name])
+            for propty in plydata.elements[0].properties
+        }
+    )
 
 
 def csv2df(filepath: str) -> pd.DataFrame:
@@ -155,7 +190,7 @@ def df2las(
     """
     This method serializes a pandas DataFrame in .las
     """
-    if filepath.split(".")[-1] not in ["las", "laz"]:
+    if get_file_extension(filepath) not in ["las", "laz"]:
         raise ValueError(
             "Filepath extension is invalid. It should either be 'las' or "
             "'laz'."
@@ -217,7 +252,7 @@ def df2las(
     las.write(filepath)
 
 
-def df2o3d(df_pcd: pd.DataFrame) -> o3d.geometry.PointCloud:
+def df2o3d(df_pcd: pd.DataFrame) -> "o3d.geometry.PointCloud":
     """pandas.DataFrame to Open3D Point Cloud"""
     from ..tools.handlers import PointCloud
 
@@ -230,7 +265,7 @@ def df2o3d(df_pcd: pd.DataFrame) -> o3d.geometry.PointCloud:
 def df2csv(filepath: str, df_pcd: pd.DataFrame, **kwargs):
     """pandas DataFrame to csv file"""
 
-    if filepath.split(".")[-1] != "csv":
+    if get_file_extension(filepath) != "csv":
         raise ValueError("Filepath extension is invalid. It should be 'csv'.")
 
     df_pcd.to_csv(filepath, index=False, **kwargs)
@@ -243,7 +278,7 @@ def df2csv(filepath: str, df_pcd: pd.DataFrame, **kwargs):
 
 def deserialize_point_cloud(filepath: str) -> pd.DataFrame:
     """Convert a point cloud to a pandas dataframe"""
-    extension = filepath.split(".")[-1]
+    extension = get_file_extension(filepath)
 
     if extension in ("las", "laz"):
         df_pcd = las2df(filepath)
@@ -272,9 +307,10 @@ def serialize_point_cloud(
 ):
     """Serialize a point cloud to disk in the format asked by the user"""
 
-    if filepath.split(".")[-1] != extension:
+    filepath_extension = get_file_extension(filepath)
+    if filepath_extension != extension:
         raise ValueError(
-            f"Filepath extension ('{filepath.split('.')[-1]}') "
+            f"Filepath extension ('{filepath_extension}') "
             f"is inconsistent with the extension asked ('{extension}')."
         )
 
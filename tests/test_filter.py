@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (C) 2023 CNES.
+#
+# This file is part of cars-mesh
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Tests for the point cloud filtering methods of cars_mesh."""
+
+# Third party imports
+import numpy as np
+import pytest
+
+# cars_mesh imports
+from cars_mesh.core import filter as pcd_filter
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_local_density_kernel_matches_numpy(monkeypatch):
+    """
+    Test that the numba kernel computes the same outlier probabilities and
+    mean distances as the numpy fallback, including duplicated points (null
+    distances to all the neighbours)
+    """
+    pytest.importorskip("numba")
+
+    rng = np.random.default_rng(0)
+    distances = np.sort(rng.random((1000, 10)) * 3.0, axis=1)
+    distances[:, 0] = 0.0
+    distances[0, :] = 0.0
+
+    compute_proba = pcd_filter.compute_local_density_outlier_proba
+    proba_numba, mean_numba = compute_proba(distances)
+    monkeypatch.setattr(pcd_filter, "NUMBA_AVAILABLE", False)
+    with np.errstate(invalid="ignore"):
+        proba_numpy, mean_numpy = compute_proba(distances)
+
+    np.testing.assert_allclose(mean_numba, mean_numpy, rtol=1e-12)
+    np.testing.assert_allclose(proba_numba, proba_numpy, rtol=1e-9)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (C) 2023 CNES.
+#
+# This file is part of cars-mesh
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Tests for the point cloud and mesh handlers of cars_mesh."""
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# cars_mesh imports
+from cars_mesh.tools.handlers import PointCloud
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_get_normalized_rgb_array():
+    """
+    Test that the colors are normalized in [0, 1] with the same scale for
+    the three bands
+    """
+    pcd = PointCloud(
+        df=pd.DataFrame(
+            {
+                "x": [0.0, 1.0, 2.0],
+                "y": [0.0, 1.0, 2.0],
+                "z": [0.0, 1.0, 2.0],
+                "red": [100, 300, 500],
+                "green": [200, 200, 200],
+                "blue": [100, 100, 100],
+            }
+        )
+    )
+
+    colors = pcd.get_normalized_rgb_array()
+
+    assert colors.dtype == np.float64
+    assert colors.flags.c_contiguous
+    np.testing.assert_allclose(
+        colors,
+        [[0.0, 0.25, 0.0], [0.5, 0.25, 0.0], [1.0, 0.25, 0.0]],
+    )
+    # The DataFrame is left untouched
+    np.testing.assert_array_equal(pcd.df["red"], [100, 300, 500])
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_get_normalized_rgb_array_constant():
+    """Test that constant colors are normalized to zero"""
+    pcd = PointCloud(
+        df=pd.DataFrame(
+            {c: [42.0, 42.0] for c in ["x", "y", "z", "red", "green", "blue"]}
+        )
+    )
+
+    np.testing.assert_array_equal(pcd.get_normalized_rgb_array(), 0.0)
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_get_normalized_rgb_array_missing_band():
+    """Test that a missing RGB band raises an error"""
+    pcd = PointCloud(
+        df=pd.DataFrame({c: [1.0, 2.0] for c in ["x", "y", "z", "red", "nir"]})
+    )
+
+    with pytest.raises(ValueError):
+        pcd.get_normalized_rgb_array()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (C) 2023 CNES.
+#
+# This file is part of cars-mesh
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Tests for the mesh input/output tools of cars_mesh."""
+
+# Standard imports
+import os
+from tempfile import TemporaryDirectory
+
+# Third party imports
+import numpy as np
+import pandas as pd
+import pytest
+
+# cars_mesh imports
+from cars_mesh.tools.handlers import Mesh
+from cars_mesh.tools.mesh_io import mesh2ply, ply2mesh
+
+# Tests helpers
+from .helpers import get_temporary_dir
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_ply_round_trip():
+    """
+    Test that a mesh written with mesh2ply is read back by ply2mesh with the
+    same vertices, faces and colors (8-bit colors spanning [0, 255] are
+    normalized without loss)
+    """
+    rng = np.random.default_rng(0)
+    num_points = 100
+    colors = rng.integers(0, 256, size=(num_points, 3)).astype(np.float64)
+    colors[0] = [0.0, 0.0, 0.0]
+    colors[1] = [255.0, 255.0, 255.0]
+    pcd = pd.DataFrame(
+        np.hstack([rng.random((num_points, 3)) * 100.0, colors]),
+        columns=["x", "y", "z", "red", "green", "blue"],
+    )
+    triangles = pd.DataFrame(
+        rng.integers(0, num_points, size=(150, 3)), columns=["p1", "p2", "p3"]
+    )
+
+    with TemporaryDirectory(dir=get_temporary_dir()) as tmp_dir:
+        filepath = os.path.join(tmp_dir, "mesh.ply")
+        mesh2ply(filepath, Mesh(pcd=pcd, mesh=triangles))
+        pcd_read, triangles_read = ply2mesh(filepath)
+
+    np.testing.assert_array_equal(
+        pcd_read[["x", "y", "z"]].to_numpy(), pcd[["x", "y", "z"]].to_numpy()
+    )
+    np.testing.assert_array_equal(triangles_read.to_numpy(), triangles)
+    np.testing.assert_allclose(
+        255.0 * pcd_read[["red", "green", "blue"]].to_numpy(), colors
+    )
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (C) 2023 CNES.
+#
+# This file is part of cars-mesh
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Tests for the neighbour search tools of cars_mesh."""
+
+# Third party imports
+import numpy as np
+import pytest
+from scipy.spatial import KDTree
+
+# cars_mesh imports
+from cars_mesh.tools.neighbours import morton_order, query_knn
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_morton_order():
+    """
+    Test that the Morton order of the corners of a cube interleaves the
+    bits of x, y and z (x being the lowest one)
+    """
+    corners = np.array(
+        [[x, y, z] for z in (1.0, 0.0) for y in (0.0, 1.0) for x in (1.0, 0.0)]
+    )
+    codes = corners[:, 0] + 2 * corners[:, 1] + 4 * corners[:, 2]
+
+    order = morton_order(corners)
+
+    np.testing.assert_array_equal(codes[order], np.arange(8))
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_morton_order_permutation():
+    """Test that the Morton order is a permutation of the points"""
+    points = np.random.default_rng(0).random((1000, 3)) * [1e3, 1.0, 0.0]
+
+    order = morton_order(points)
+
+    np.testing.assert_array_equal(np.sort(order), np.arange(1000))
+
+    with pytest.raises(ValueError):
+        morton_order(points, nb_bits=22)
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+@pytest.mark.parametrize("spatial_sort", [False, True])
+def test_query_knn(spatial_sort):
+    """
+    Test that the neighbours are the same as the ones of a scipy KDTree, in
+    the input point order
+    """
+    points = np.random.default_rng(0).random((2000, 3)) * [100.0, 100.0, 5.0]
+
+    distances, indexes = query_knn(points, 10, spatial_sort=spatial_sort)
+    ref_distances, ref_indexes = KDTree(points).query(points, k=10)
+
+    np.testing.assert_array_equal(indexes, ref_indexes)
+    np.testing.assert_allclose(distances, ref_distances, rtol=1e-12)
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (C) 2023 CNES.
+#
+# This file is part of cars-mesh
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Tests for the normal computation tools of cars_mesh."""
+
+# Third party imports
+import numpy as np
+import pytest
+from scipy.spatial import KDTree
+
+# cars_mesh imports
+from cars_mesh.tools import normals
+
+
+def noisy_surface(num_points: int = 2000, seed: int = 0) -> np.ndarray:
+    """Points sampled on a noisy wavy surface"""
+    rng = np.random.default_rng(seed)
+    points = np.empty((num_points, 3))
+    points[:, :2] = rng.random((num_points, 2)) * 50.0
+    points[:, 2] = np.sin(points[:, 0] / 5.0) + rng.normal(0, 0.05, num_points)
+    return points
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+@pytest.mark.parametrize("weighted", [False, True])
+def test_normals_kernel_matches_numpy(monkeypatch, weighted):
+    """
+    Test that the numba kernel computes the same normals as the numpy
+    fallback, with and without weights on the neighbours
+    """
+    pytest.importorskip("numba")
+
+    points = noisy_surface()
+    distances, ind = KDTree(points).query(points, k=20)
+    weights = np.exp(-(distances**2)) if weighted else None
+
+    normals_numba = normals.compute_normals_from_indexes(points, ind, weights)
+    monkeypatch.setattr(normals, "NUMBA_AVAILABLE", False)
+    normals_numpy = normals.compute_normals_from_indexes(points, ind, weights)
+
+    # Normals are defined up to their sign
+    np.testing.assert_allclose(
+        np.abs(np.sum(normals_numba * normals_numpy, axis=1)), 1.0, atol=1e-9
+    )
+
+
+def random_covariances(num_matrices: int = 500, seed: int = 0) -> np.ndarray:
+    """Covariance matrices of random neighbourhoods, plus degenerate ones"""
+    rng = np.random.default_rng(seed)
+    neighbours = rng.normal(size=(num_matrices, 20, 3)) * rng.random(
+        (num_matrices, 1, 3)
+    )
+    centered = neighbours - np.mean(neighbours, axis=1, keepdims=True)
+    cov_mat = np.einsum("nki,nkj->nij", centered, centered) / 20
+
+    degenerate = np.array(
+        [
+            # null matrix
+            np.zeros((3, 3)),
+            # isotropic neighbourhood: triple eigen value
+            np.eye(3),
+            # points on a line: double null eigen value
+            np.outer([1.0, 2.0, 3.0], [1.0, 2.0, 3.0]),
+            # points on a plane: simple null eigen value
+            np.diag([1.0, 1.0, 0.0]),
+            # points on a disk: double largest eigen value
+            np.diag([2.0, 2.0, 1e-3]),
+            # nearly planar neighbourhood
+            np.diag([4.0, 1.0, 1e-12]),
+        ]
+    )
+
+    return np.concatenate([cov_mat, degenerate])
+
+
+def check_smallest_eigenvectors(cov_mat: np.ndarray, eigen_vectors):
+    """
+    Check that the eigen vectors are unitary and associated with the smallest
+    eigen values computed by numpy.linalg.eigh
+    """
+    eigen_values, eigh_vectors = np.linalg.eigh(cov_mat)
+
+    np.testing.assert_allclose(
+        np.linalg.norm(eigen_vectors, axis=1), 1.0, atol=1e-12
+    )
+
+    # Residual relative to the matrix scale, since the eigen vector is not
+    # unique when the smallest eigen value is not simple
+    residuals = (
+        np.einsum("nij,nj->ni", cov_mat, eigen_vectors)
+        - eigen_values[:, :1] * eigen_vectors
+    )
+    scale = np.maximum(np.trace(cov_mat, axis1=1, axis2=2), 1.0)
+    np.testing.assert_array_less(
+        np.linalg.norm(residuals, axis=1) / scale, 1e-10
+    )
+
+    # Up to their sign, same vectors as numpy for well separated eigen values
+    simple = eigen_values[:, 1] - eigen_values[:, 0] > 1e-3 * scale
+    np.testing.assert_allclose(
+        np.abs(np.sum(eigen_vectors * eigh_vectors[:, :, 0], axis=1))[simple],
+        1.0,
+        atol=1e-9,
+    )
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_symmetric_3x3_smallest_eigenvector():
+    """
+    Test the closed form solver of the numpy normal computation against
+    numpy.linalg.eigh, including degenerate matrices
+    """
+    cov_mat = random_covariances()
+
+    check_smallest_eigenvectors(
+        cov_mat, normals.symmetric_3x3_smallest_eigenvector(cov_mat)
+    )
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_smallest_eigenvector_3x3():
+    """
+    Test the scalar solver of the compiled normal computation against
+    numpy.linalg.eigh, including degenerate matrices
+    """
+    cov_mat = random_covariances()
+
+    # pylint: disable-next=protected-access
+    solver = normals._smallest_eigenvector_3x3
+    eigen_vectors = np.array(
+        [
+            solver(
+                mat[0, 0], mat[0, 1], mat[0, 2], mat[1, 1], mat[1, 2], mat[2, 2]
+            )
+            for mat in cov_mat
+        ]
+    )
+
+    check_smallest_eigenvectors(cov_mat, eigen_vectors)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# coding: utf8
+#
+# Copyright (C) 2023 CNES.
+#
+# This file is part of cars-mesh
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Tests for the point cloud input/output tools of cars_mesh."""
+
+# Standard imports
+import os
+
+# Third party imports
+import laspy
+import numpy as np
+import pytest
+
+# cars_mesh imports
+from cars_mesh.tools.point_cloud_io import get_file_extension, las2df
+
+# Tests helpers
+from .helpers import get_test_data_path
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+@pytest.mark.parametrize(
+    "filepath,extension",
+    [
+        ("point_cloud.laz", "laz"),
+        ("/path/to/MESH.PLY", "ply"),
+        ("archive.tar.gz", "gz"),
+        ("dir.name/file", ""),
+    ],
+)
+def test_get_file_extension(filepath, extension):
+    """Test that the extension is in lower case and without the dot"""
+    assert get_file_extension(filepath) == extension
+
+
+@pytest.mark.unit_tests
+@pytest.mark.fast
+def test_las2df():
+    """
+    Test that reading a LAZ file by chunks gives the same columns as reading
+    it at once with laspy
+    """
+    filepath = os.path.join(
+        get_test_data_path("toulouse_test_data"), "point_cloud.laz"
+    )
+
+    # The chunk size does not divide the number of points
+    df_pcd = las2df(filepath, chunk_size=100_000)
+    las = laspy.read(filepath)
+
+    assert list(df_pcd.columns) == [
+        "x",
+        "y",
+        "z",
+        "red",
+        "green",
+        "blue",
+        "nir",
+        "classification",
+    ]
+    np.testing.assert_array_equal(df_pcd[["x", "y", "z"]].to_numpy(), las.xyz)
+    for c in ["red", "green", "blue", "nir", "classification"]:
+        np.testing.assert_array_equal(df_pcd[c].to_numpy(), np.asarray(las[c]))